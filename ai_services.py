@@ -1,9 +1,11 @@
 import os
 import time
+import sqlite3
 import requests
 from dotenv import load_dotenv
 import google.generativeai as genai
 from huggingface_hub import InferenceClient
+from shared_state import shared_state
 
 load_dotenv()
 
@@ -14,6 +16,18 @@ GEMINI_MODELS = [
     "gemini-robotics-er-1.5-preview", # 10 RPM, 250K TPM
 ]
 
+# Gemini kotaları (tüm worker süreçleri arasında paylaşılır)
+GEMINI_QUOTAS = {
+    "gemini-2.5-flash-lite": {"rpm": 10, "tpm": 250000},
+    "gemini-2.5-flash": {"rpm": 5, "tpm": 250000},
+    "gemini-robotics-er-1.5-preview": {"rpm": 10, "tpm": 250000},
+}
+DEFAULT_GEMINI_QUOTA = {"rpm": 5, "tpm": 250000}
+
+# Hugging Face eşzamanlı istek limiti (tüm worker süreçleri için toplam)
+HUGGINGFACE_MAX_CONCURRENCY = int(os.getenv("HUGGINGFACE_MAX_CONCURRENCY", "2"))
+HUGGINGFACE_SLOT_TIMEOUT = float(os.getenv("HUGGINGFACE_SLOT_TIMEOUT", "30"))
+
 # Hugging Face Modelleri (Açık kaynak, ücretsiz)
 HUGGINGFACE_MODELS = [
     "Qwen/Qwen2.5-Coder-32B-Instruct", 
@@ -29,6 +43,33 @@ def get_all_models():
         models.append({"name": model, "provider": "huggingface"})
     return models
 
+def estimate_tokens(text: str) -> int:
+    """Kaba token tahmini (~4 karakter/token)"""
+    return max(1, len(text or "") // 4)
+
+def _error_result(error: str) -> dict:
+    return {
+        "success": False,
+        "error": error,
+        "response": None,
+        "response_time": 0
+    }
+
+def _shared_state_error(e: Exception) -> dict:
+    # Paylaşılan durum okunamazsa istek reddedilir (fail closed): kota
+    # doğrulanamadan sağlayıcıya gitmek tüm worker'ların limiti aşmasına yol açabilir
+    return _error_result(f"Shared quota state unavailable: {e}")
+
+def _record_outcome(model_name: str, error: str = None):
+    """Sağlık kaydı en iyi çaba ile yapılır; paylaşılan durum hatası sonucu değiştirmez"""
+    try:
+        if error is None:
+            shared_state.record_success(model_name)
+        else:
+            shared_state.record_failure(model_name, error)
+    except sqlite3.Error as e:
+        print(f"⚠️ Model sağlığı kaydedilemedi ({model_name}): {e}")
+
 class GeminiService:
     def __init__(self):
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -47,25 +88,46 @@ class GeminiService:
                 "response_time": 0
             }
         
+        quota = GEMINI_QUOTAS.get(model_name, DEFAULT_GEMINI_QUOTA)
+        try:
+            if not shared_state.is_available(model_name):
+                return _error_result(f"{model_name} is cooling down after repeated failures")
+            # RPM ve TPM birlikte tüketilir; biri reddederse diğeri de harcanmaz
+            if not shared_state.consume_many([
+                (f"gemini:{model_name}:rpm", 1, quota["rpm"]),
+                (f"gemini:{model_name}:tpm", estimate_tokens(prompt), quota["tpm"]),
+            ]):
+                return _error_result(f"RPM/TPM quota exceeded for {model_name}")
+        except sqlite3.Error as e:
+            return _shared_state_error(e)
+        
         try:
             start_time = time.time()
             model = genai.GenerativeModel(model_name)
             response = model.generate_content(prompt)
+            text = response.text
             end_time = time.time()
-            
-            return {
-                "success": True,
-                "response": response.text,
-                "response_time": round(end_time - start_time, 2),
-                "model": model_name
-            }
         except Exception as e:
+            _record_outcome(model_name, str(e))
             return {
                 "success": False,
                 "error": str(e),
                 "response": None,
                 "response_time": 0
             }
+        
+        # Yanıt tokenlarını da kotaya say; başarılı yanıt bu yüzden hataya dönüşmez
+        try:
+            shared_state.consume(f"gemini:{model_name}:tpm", estimate_tokens(text))
+        except sqlite3.Error as e:
+            print(f"⚠️ Yanıt tokenları kotaya eklenemedi ({model_name}): {e}")
+        _record_outcome(model_name)
+        return {
+            "success": True,
+            "response": text,
+            "response_time": round(end_time - start_time, 2),
+            "model": model_name
+        }
 
 class HuggingFaceService:
     def __init__(self):
@@ -85,6 +147,23 @@ class HuggingFaceService:
                 "response_time": 0
             }
         
+        try:
+            if not shared_state.is_available(model_name):
+                return _error_result(f"{model_name} is cooling down after repeated failures")
+            if not shared_state.wait_for_slot("huggingface:inflight", HUGGINGFACE_MAX_CONCURRENCY, HUGGINGFACE_SLOT_TIMEOUT):
+                return _error_result("Hugging Face concurrency limit reached")
+        except sqlite3.Error as e:
+            return _shared_state_error(e)
+        try:
+            result = self._generate(prompt, model_name)
+        finally:
+            # Kilitli veritabanında hata vermez, slot bir sonraki acquire'da geri verilir
+            shared_state.release_slot("huggingface:inflight")
+        
+        _record_outcome(model_name, None if result["success"] else result["error"])
+        return result
+    
+    def _generate(self, prompt: str, model_name: str) -> dict:
         try:
             start_time = time.time()
             
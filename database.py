@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -11,6 +13,17 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # auto_vacuum, WAL'a geçişten önce ayarlanmalı; WAL dosya başlığını yazdıktan
+    # sonra yapılan değişiklik sessizce yok sayılır (yalnızca yeni dosyalarda etkili)
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL modu arşivleme sırasında okuyucuların bloklanmamasını sağlar
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -19,5 +32,31 @@ def get_db():
         db.close()
 
 def init_db():
-    from models import ErrorCategory, ErrorType, Question, AIResult
+    from models import (
+        ErrorCategory, ErrorType, Question, AIResult, ArchivedAIResult, MaintenanceLease, DataVersion
+    )
     Base.metadata.create_all(bind=engine)
+    # Mevcut tablolara sonradan eklenen indeksleri oluştur
+    for index in AIResult.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+def bump_data_version(db, *models):
+    """Yazılan tabloların sürümünü artırır; commit çağırana bırakılır (Session veya Connection)"""
+    from models import DataVersion
+    # İlk sürüm zaman damgasıdır; veritabanı sıfırlansa da eski ETag'lerle çakışmaz
+    for model in models:
+        stmt = sqlite_insert(DataVersion).values(
+            table_name=model.__tablename__, version=time.time_ns() // 1000
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DataVersion.table_name],
+            set_={"version": DataVersion.version + 1}
+        ))
+
+def get_data_versions(db, *models) -> list:
+    """Verilen tabloların güncel sürümlerini aynı sırada döndürür (yazılmamışsa 0)"""
+    from models import DataVersion
+    names = [m.__tablename__ for m in models]
+    rows = dict(db.query(DataVersion.table_name, DataVersion.version)
+                .filter(DataVersion.table_name.in_(names)).all())
+    return [rows.get(name, 0) for name in names]
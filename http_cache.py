@@ -0,0 +1,104 @@
+import hashlib
+import os
+import re
+from urllib.parse import parse_qs
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.staticfiles import StaticFiles
+
+STATIC_DIR = "static"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# ==================== ETAG ====================
+
+def make_etag(*parts) -> str:
+    """Veri sürümlerinden zayıf bir ETag üretir.
+
+    Aynı veri identity, gzip ve br olarak bayt bazında farklı gövdelerle
+    gönderildiği için güçlü değil zayıf (W/) doğrulayıcı kullanılır.
+    """
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+def _opaque_tag(etag: str) -> str:
+    return etag.strip().removeprefix("W/").strip('"')
+
+def _if_none_match(header: str, etag: str) -> bool:
+    # If-None-Match zayıf karşılaştırma kullanır: W/ öneki yok sayılır
+    if header.strip() == "*":
+        return True
+    return _opaque_tag(etag) in [_opaque_tag(tag) for tag in header.split(",")]
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match başlığı verilen ETag ile eşleşiyor mu"""
+    header = request.headers.get("if-none-match")
+    return bool(header) and _if_none_match(header, etag)
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE})
+
+def etag_json(content, etag: str) -> JSONResponse:
+    return JSONResponse(content, headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE})
+
+# ==================== STATIC ====================
+
+_fingerprints = {}
+
+def static_fingerprint(path: str) -> str:
+    """Statik dosyanın içerik özeti (dosya değiştiğinde yeniden hesaplanır)"""
+    full_path = os.path.join(STATIC_DIR, path)
+    mtime = os.path.getmtime(full_path)
+    cached = _fingerprints.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(full_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    _fingerprints[path] = (mtime, digest)
+    return digest
+
+_STATIC_URL = re.compile(r'(["\'])/static/([^"\'?#]+\.(?:css|js))\1')
+
+def render_index(path: str = os.path.join(STATIC_DIR, "index.html")) -> HTMLResponse:
+    """index.html'i statik dosya URL'leri parmak iziyle sürümlenmiş olarak döndürür"""
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    html = _STATIC_URL.sub(
+        lambda m: f"{m.group(1)}/static/{m.group(2)}?v={static_fingerprint(m.group(2))}{m.group(1)}",
+        html
+    )
+    return HTMLResponse(html, headers={"Cache-Control": REVALIDATE_CACHE})
+
+class CachedStaticFiles(StaticFiles):
+    """Parmak izli (?v=...) isteklere uzun süreli önbellek başlığı ekler"""
+
+    def is_not_modified(self, response_headers, request_headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        etag = response_headers.get("etag")
+        if if_none_match and etag:
+            return _if_none_match(if_none_match, etag)
+        return super().is_not_modified(response_headers, request_headers)
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await super().get_response(path, scope)
+        # Sıkıştırma middleware'i gövdeyi değiştirebildiğinden ETag zayıflatılır
+        etag = response.headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            response.headers["etag"] = f'W/"{_opaque_tag(etag)}"'
+        if response.status_code in (200, 304):
+            if self._is_current_fingerprint(path, scope):
+                response.headers["Cache-Control"] = IMMUTABLE_CACHE
+            else:
+                response.headers["Cache-Control"] = REVALIDATE_CACHE
+        return response
+
+    def _is_current_fingerprint(self, path: str, scope) -> bool:
+        # Eski bir parmak izi yeni içeriği bir yıl boyunca eski URL'ye sabitlerdi
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        version = query.get("v", [None])[0]
+        if not version:
+            return False
+        try:
+            return version == static_fingerprint(path)
+        except OSError:
+            return False
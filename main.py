@@ -1,25 +1,45 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+import asyncio
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-from database import get_db, init_db
-from models import ErrorCategory, ErrorType, Question, AIResult
+from database import get_db, init_db, bump_data_version, get_data_versions
+from models import ErrorCategory, ErrorType, Question, AIResult, ArchivedAIResult
+from retention import retention_enabled, run_archiver, archive_loop
+from http_cache import (
+    CachedStaticFiles,
+    render_index,
+    make_etag,
+    etag_matches,
+    not_modified,
+    etag_json
+)
+from shared_state import shared_state
 from ai_services import (
     get_all_models, 
     test_question_with_model, 
     test_question_with_all_models,
     GEMINI_MODELS,
-    HUGGINGFACE_MODELS
+    GEMINI_QUOTAS,
+    DEFAULT_GEMINI_QUOTA,
+    HUGGINGFACE_MODELS,
+    HUGGINGFACE_MAX_CONCURRENCY
 )
 
 app = FastAPI(title="Hata Türleri AI Test Sistemi")
 
+# Yanıt sıkıştırma: brotli kuruluysa br, değilse gzip
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # Static dosyaları serve et
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Pydantic modelleri
 class QuestionCreate(BaseModel):
@@ -37,27 +57,34 @@ class TestAllRequest(BaseModel):
 # Ana sayfa
 @app.get("/")
 async def root():
-    return FileResponse("static/index.html")
+    return render_index()
 
 # Veritabanını başlat
 @app.on_event("startup")
 async def startup():
     init_db()
+    # Saklama politikası tanımlıysa arşivleyiciyi arka planda başlat
+    if retention_enabled():
+        app.state.archive_task = asyncio.create_task(archive_loop())
 
 # ==================== KATEGORI ENDPOINTLERI ====================
 
 @app.get("/api/categories")
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(request: Request, db: Session = Depends(get_db)):
     """Tüm hata kategorilerini getirir"""
+    etag = make_etag("categories", *get_data_versions(db, ErrorCategory, ErrorType, Question))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     categories = db.query(ErrorCategory).all()
-    return [{
+    return etag_json([{
         "id": c.id,
         "category_code": c.category_code,
         "category_name": c.category_name,
         "description": c.description,
         "error_count": len(c.error_types),
         "question_count": len(c.questions)
-    } for c in categories]
+    } for c in categories], etag)
 
 @app.get("/api/categories/{category_id}")
 def get_category(category_id: int, db: Session = Depends(get_db)):
@@ -110,6 +137,7 @@ def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
         question_text=question.question_text
     )
     db.add(new_question)
+    bump_data_version(db, Question)
     db.commit()
     db.refresh(new_question)
     
@@ -127,9 +155,11 @@ def delete_question(question_id: int, db: Session = Depends(get_db)):
     if not question:
         raise HTTPException(status_code=404, detail="Soru bulunamadı")
     
-    # Önce sonuçları sil
+    # Önce sonuçları ve arşivlenmiş sonuçları sil
     db.query(AIResult).filter(AIResult.question_id == question_id).delete()
+    db.query(ArchivedAIResult).filter(ArchivedAIResult.question_id == question_id).delete()
     db.delete(question)
+    bump_data_version(db, Question, AIResult)
     db.commit()
     
     return {"message": "Soru silindi"}
@@ -137,12 +167,32 @@ def delete_question(question_id: int, db: Session = Depends(get_db)):
 # ==================== MODEL ENDPOINTLERI ====================
 
 @app.get("/api/models")
-def get_models():
+def get_models(request: Request):
     """Kullanılabilir tüm modelleri getirir"""
-    return {
+    etag = make_etag("models", *GEMINI_MODELS, *HUGGINGFACE_MODELS)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    return etag_json({
         "gemini": GEMINI_MODELS,
         "huggingface": HUGGINGFACE_MODELS,
         "all": get_all_models()
+    }, etag)
+
+@app.get("/api/models/health")
+def get_models_health():
+    """Tüm worker'lar arasında paylaşılan kota ve model sağlık durumunu getirir"""
+    return {
+        "gemini_quotas": [{
+            "model_name": model,
+            "rpm_used": shared_state.usage(f"gemini:{model}:rpm"),
+            "rpm_limit": GEMINI_QUOTAS.get(model, DEFAULT_GEMINI_QUOTA)["rpm"],
+            "tpm_used": shared_state.usage(f"gemini:{model}:tpm"),
+            "tpm_limit": GEMINI_QUOTAS.get(model, DEFAULT_GEMINI_QUOTA)["tpm"]
+        } for model in GEMINI_MODELS],
+        "huggingface_inflight": shared_state.inflight("huggingface:inflight"),
+        "huggingface_max_concurrency": HUGGINGFACE_MAX_CONCURRENCY,
+        "models": shared_state.get_health()
     }
 
 # ==================== TEST ENDPOINTLERI ====================
@@ -171,6 +221,7 @@ def test_with_model(request: TestRequest, db: Session = Depends(get_db)):
             response_time=result["response_time"]
         )
         db.add(ai_result)
+        bump_data_version(db, AIResult)
         db.commit()
         db.refresh(ai_result)
         
@@ -228,20 +279,24 @@ def test_with_all_models(request: TestAllRequest, db: Session = Depends(get_db))
                 "provider": result["provider"]
             })
     
+    bump_data_version(db, AIResult)
     db.commit()
     return {"results": saved_results}
 
 # ==================== SONUÇ ENDPOINTLERI ====================
 
 @app.get("/api/results")
-def get_results(question_id: Optional[int] = None, db: Session = Depends(get_db)):
+def get_results(request: Request, question_id: Optional[int] = None, db: Session = Depends(get_db)):
     """Tüm test sonuçlarını veya soru bazlı sonuçları getirir"""
+    etag = make_etag("results", question_id, *get_data_versions(db, AIResult))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     query = db.query(AIResult)
     if question_id:
         query = query.filter(AIResult.question_id == question_id)
-    
     results = query.order_by(AIResult.tested_at.desc()).all()
-    return [{
+    return etag_json([{
         "id": r.id,
         "question_id": r.question_id,
         "question_text": r.question.question_text if r.question else None,
@@ -250,18 +305,22 @@ def get_results(question_id: Optional[int] = None, db: Session = Depends(get_db)
         "response": r.response,
         "response_time": r.response_time,
         "tested_at": r.tested_at.isoformat()
-    } for r in results]
+    } for r in results], etag)
 
 @app.get("/api/results/compare/{question_id}")
-def compare_results(question_id: int, db: Session = Depends(get_db)):
+def compare_results(question_id: int, request: Request, db: Session = Depends(get_db)):
     """Bir soru için tüm model sonuçlarını karşılaştırır"""
     question = db.query(Question).filter(Question.id == question_id).first()
     if not question:
         raise HTTPException(status_code=404, detail="Soru bulunamadı")
     
+    etag = make_etag("compare", question_id, *get_data_versions(db, AIResult))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     results = db.query(AIResult).filter(AIResult.question_id == question_id).all()
     
-    return {
+    return etag_json({
         "question": {
             "id": question.id,
             "text": question.question_text,
@@ -275,7 +334,7 @@ def compare_results(question_id: int, db: Session = Depends(get_db)):
             "response_time": r.response_time,
             "tested_at": r.tested_at.isoformat()
         } for r in results]
-    }
+    }, etag)
 
 @app.delete("/api/results/{result_id}")
 def delete_result(result_id: int, db: Session = Depends(get_db)):
@@ -285,6 +344,7 @@ def delete_result(result_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Sonuç bulunamadı")
     
     db.delete(result)
+    bump_data_version(db, AIResult)
     db.commit()
     
     return {"message": "Sonuç silindi"}
@@ -319,6 +379,15 @@ def get_stats(db: Session = Depends(get_db)):
         } for s in model_stats]
     }
 
+# ==================== BAKIM ENDPOINTLERI ====================
+
+@app.post("/api/maintenance/archive")
+def archive_results():
+    """Saklama politikası dışındaki sonuçları arşive taşır"""
+    if not retention_enabled():
+        raise HTTPException(status_code=400, detail="Saklama politikası tanımlı değil")
+    return run_archiver()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
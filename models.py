@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -47,3 +47,38 @@ class AIResult(Base):
     tested_at = Column(DateTime, default=datetime.utcnow)
     
     question = relationship("Question", back_populates="results")
+    
+    # Saklama politikası sorguları (soru, model) bazında en yeni kayıtları arar
+    __table_args__ = (
+        Index("ix_ai_results_question_model_tested", "question_id", "model_name", "tested_at"),
+    )
+
+class ArchivedAIResult(Base):
+    """Saklama politikası dışında kalan ve sıcak tablodan taşınan sonuçlar"""
+    __tablename__ = "ai_results_archive"
+    
+    id = Column(Integer, primary_key=True)
+    # ai_results.id (AUTOINCREMENT olmadığı için id'ler yeniden kullanılabilir, tekil değildir)
+    result_id = Column(Integer, index=True)
+    question_id = Column(Integer, index=True)
+    model_name = Column(String(100))
+    model_provider = Column(String(50))
+    response = Column(Text)
+    response_time = Column(Float)
+    tested_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class MaintenanceLease(Base):
+    """Birden fazla worker varken bakım işini tek bir sürecin yapmasını sağlayan kira kaydı"""
+    __tablename__ = "maintenance_leases"
+    
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(100))
+    expires_at = Column(DateTime)
+
+class DataVersion(Base):
+    """Tablo bazlı veri sürümü; her yazma işleminde artırılır ve ETag'lerde kullanılır"""
+    __tablename__ = "data_versions"
+    
+    table_name = Column(String(50), primary_key=True)
+    version = Column(Integer)
@@ -0,0 +1,200 @@
+import os
+import socket
+import asyncio
+import threading
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import select, insert, delete, update, func, or_, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import SessionLocal, engine, bump_data_version
+from models import AIResult, ArchivedAIResult, MaintenanceLease
+
+load_dotenv()
+
+# Saklama politikası (0 = devre dışı)
+# RETENTION_KEEP_LAST_N: her (soru, model) için saklanacak en yeni kayıt sayısı
+# RETENTION_MAX_AGE_DAYS: bu günden yeni kayıtlar her zaman saklanır
+# İki politika birlikte verilirse, herhangi birinin tuttuğu kayıt saklanır
+RETENTION_KEEP_LAST_N = int(os.getenv("RETENTION_KEEP_LAST_N", "0"))
+RETENTION_MAX_AGE_DAYS = int(os.getenv("RETENTION_MAX_AGE_DAYS", "0"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+RETENTION_INTERVAL_MINUTES = int(os.getenv("RETENTION_INTERVAL_MINUTES", "60"))
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))
+
+# Çoklu worker'da arşivleyiciyi yalnızca kirayı tutan süreç çalıştırır;
+# kira her batch öncesi yenilenir, süreç çökerse süresi dolunca devralınır
+ARCHIVER_LEASE = "archiver"
+ARCHIVER_LEASE_SECONDS = 300
+_LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+# Kira sahibi süreç bazındadır; aynı süreçteki arka plan döngüsü ve elle tetiklenen
+# çalıştırmanın kirayı birbirinden habersiz paylaşmasını bu kilit engeller
+_archiver_lock = threading.Lock()
+
+def retention_enabled() -> bool:
+    """En az bir saklama politikası tanımlı mı"""
+    return RETENTION_KEEP_LAST_N > 0 or RETENTION_MAX_AGE_DAYS > 0
+
+def _expired_ids_query():
+    """Politika dışında kalan sonuçların id'lerini artan sırada seçer"""
+    rank = func.row_number().over(
+        partition_by=(AIResult.question_id, AIResult.model_name),
+        order_by=(AIResult.tested_at.desc(), AIResult.id.desc())
+    ).label("rank")
+    ranked = select(AIResult.id, AIResult.tested_at, rank).subquery()
+
+    keep_conditions = []
+    if RETENTION_KEEP_LAST_N > 0:
+        keep_conditions.append(ranked.c.rank <= RETENTION_KEEP_LAST_N)
+    if RETENTION_MAX_AGE_DAYS > 0:
+        cutoff = datetime.utcnow() - timedelta(days=RETENTION_MAX_AGE_DAYS)
+        keep_conditions.append(ranked.c.tested_at >= cutoff)
+
+    return (
+        select(ranked.c.id)
+        .where(~or_(*keep_conditions))
+        .order_by(ranked.c.id)
+    )
+
+def acquire_lease(db, name: str = ARCHIVER_LEASE, ttl: int = ARCHIVER_LEASE_SECONDS) -> bool:
+    """Kira boşsa, süresi dolmuşsa veya zaten bu süreçteyse alır/yeniler"""
+    now = datetime.utcnow()
+    stmt = sqlite_insert(MaintenanceLease).values(
+        name=name, owner=_LEASE_OWNER, expires_at=now + timedelta(seconds=ttl)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MaintenanceLease.name],
+        set_={"owner": stmt.excluded.owner, "expires_at": stmt.excluded.expires_at},
+        where=or_(MaintenanceLease.expires_at < now, MaintenanceLease.owner == _LEASE_OWNER)
+    )
+    try:
+        db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    owner = db.execute(select(MaintenanceLease.owner).where(MaintenanceLease.name == name)).scalar()
+    db.rollback()
+    return owner == _LEASE_OWNER
+
+def release_lease(db, name: str = ARCHIVER_LEASE):
+    db.execute(
+        update(MaintenanceLease)
+        .where(MaintenanceLease.name == name, MaintenanceLease.owner == _LEASE_OWNER)
+        .values(expires_at=datetime.utcnow())
+    )
+    db.commit()
+
+def find_expired_ids(db) -> list:
+    """Pencere fonksiyonu tüm tabloyu taradığı için çalıştırma başına bir kez hesaplanır"""
+    return db.execute(_expired_ids_query()).scalars().all()
+
+def archive_batch(db, ids: list) -> int:
+    """Verilen sonuçları tek bir transaction içinde arşive taşır"""
+    if not ids:
+        return 0
+
+    columns = ["question_id", "model_name", "model_provider",
+               "response", "response_time", "tested_at"]
+    source = select(
+        AIResult.id,
+        *[getattr(AIResult, c) for c in columns],
+        literal(datetime.utcnow()).label("archived_at")
+    ).where(AIResult.id.in_(ids))
+
+    try:
+        db.execute(insert(ArchivedAIResult).from_select(["result_id"] + columns + ["archived_at"], source))
+        # Arada silinmiş sonuçlar atlanır; gerçekten taşınan satır sayısı döner
+        moved = db.execute(delete(AIResult).where(AIResult.id.in_(ids))).rowcount
+        bump_data_version(db, AIResult)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return moved
+
+def enable_incremental_vacuum() -> bool:
+    """auto_vacuum kapalı mevcut bir veritabanını tek seferlik VACUUM ile dönüştürür"""
+    # VACUUM transaction dışında çalışmalı; tüm veritabanını yeniden yazar
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            return False
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+def incremental_vacuum(pages: int = RETENTION_VACUUM_PAGES) -> bool:
+    """auto_vacuum=INCREMENTAL ise boş sayfaları dosyaya geri verir"""
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return False
+        # execute() pragmayı tek adım çalıştırır (tek sayfa); executescript sonuna kadar çalıştırır
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+    finally:
+        raw.close()
+    return True
+
+def run_archiver(max_batches: int = None) -> dict:
+    """Politika dışındaki sonuçları batch'ler halinde arşivler ve vacuum çalıştırır"""
+    if not retention_enabled():
+        return {"archived": 0, "batches": 0, "vacuumed": False}
+
+    skipped = {"archived": 0, "batches": 0, "vacuumed": False, "skipped": True}
+    if not _archiver_lock.acquire(blocking=False):
+        # Bu süreçte zaten bir arşivleme sürüyor
+        return skipped
+    try:
+        summary = _run_archiver(max_batches)
+        return skipped if summary is None else summary
+    finally:
+        _archiver_lock.release()
+
+def _run_archiver(max_batches: int = None):
+    archived = 0
+    batches = 0
+    leased = False
+    db = SessionLocal()
+    try:
+        if not acquire_lease(db):
+            # Başka bir worker arşivliyor
+            return None
+        leased = True
+        expired = find_expired_ids(db)
+        db.rollback()  # Okuma transaction'ını bırak, batch'ler kendi transaction'ında çalışır
+        # id sırasına göre ardışık dilimler (keyset): her batch kısa bir yazma kilidi alır
+        for start in range(0, len(expired), RETENTION_BATCH_SIZE):
+            if max_batches is not None and batches >= max_batches:
+                break
+            if not acquire_lease(db):
+                break
+            archived += archive_batch(db, expired[start:start + RETENTION_BATCH_SIZE])
+            batches += 1
+        vacuumed = incremental_vacuum() if archived else False
+    finally:
+        db.rollback()
+        if leased:
+            release_lease(db)
+        db.close()
+    return {"archived": archived, "batches": batches, "vacuumed": vacuumed}
+
+async def archive_loop():
+    """Arşivleyiciyi belirli aralıklarla arka planda çalıştırır"""
+    while True:
+        try:
+            summary = await asyncio.to_thread(run_archiver)
+            if summary["archived"]:
+                print(f"🗄️ {summary['archived']} sonuç arşivlendi ({summary['batches']} batch)")
+        except Exception as e:
+            print(f"❌ Arşivleme hatası: {e}")
+        await asyncio.sleep(RETENTION_INTERVAL_MINUTES * 60)
+
+if __name__ == "__main__":
+    import sys
+    from database import init_db
+    init_db()
+    if "--enable-vacuum" in sys.argv:
+        print("✅ auto_vacuum=INCREMENTAL etkinleştirildi" if enable_incremental_vacuum()
+              else "auto_vacuum zaten INCREMENTAL")
+    print(run_archiver())
@@ -1,5 +1,13 @@
-from database import SessionLocal, init_db
-from models import ErrorCategory, ErrorType
+import argparse
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, func
+
+from database import SessionLocal, engine, init_db, bump_data_version
+from models import ErrorCategory, ErrorType, Question, AIResult
 
 # Tablodaki hata kategorileri ve tipleri
 ERROR_DATA = {
@@ -162,6 +170,7 @@ def seed_database():
                 )
                 db.add(error)
         
+        bump_data_version(db, ErrorCategory, ErrorType)
         db.commit()
         print(f"✅ {len(ERROR_DATA)} kategori ve hata tipleri başarıyla eklendi!")
         
@@ -171,5 +180,267 @@ def seed_database():
     finally:
         db.close()
 
-if __name__ == "__main__":
+# Ölçek modu için sentetik veri parametreleri
+SCALE_RESULTS_PER_QUESTION = 20
+SCALE_BATCH_SIZE = 10000
+SCALE_DAYS = 180
+SCALE_RESPONSE_MEDIAN = 1200   # karakter
+SCALE_RESPONSE_MAX = 8000
+# Metin havuzu üst sınırı; brotli penceresinden (4 MB) çok büyük olmalı ki aynı
+# yanıtta tekrar eden dilimler sıkıştırmayı yapay olarak şişirmesin
+SCALE_TEXT_POOL_MAX = 64 * 1024 * 1024
+# Kıyaslamada tek istekte işlenmesine izin verilen en fazla satır (sayfalama olmayan listeler için)
+BENCH_MAX_ROWS = 50000
+
+QUESTION_TEMPLATES = [
+    "{error} hatasının olası nedenleri nelerdir ve nasıl çözülür?",
+    "Test otomasyonunda {error} aldığımda ilk neyi kontrol etmeliyim?",
+    "{category} kapsamında {error} hatasını nasıl tekrar üretebilirim?",
+    "CI ortamında ara sıra {error} oluşuyor, kök neden analizi nasıl yapılır?",
+    "{error} için loglarda hangi ipuçlarına bakmalıyım?",
+]
+
+RESPONSE_SENTENCES = [
+    "Bu hata genellikle test ortamının yapılandırmasıyla ilgilidir.",
+    "Öncelikle ilgili servisin loglarını inceleyin ve zaman damgalarını karşılaştırın.",
+    "Sorunun kalıcı olup olmadığını anlamak için testi birkaç kez tekrar çalıştırın.",
+    "Bekleme sürelerini sabit değerler yerine koşullu beklemelerle değiştirin.",
+    "Bağımlılık sürümlerinin ortamlar arasında tutarlı olduğundan emin olun.",
+    "Hata yığınındaki ilk uygulama satırı genellikle kök nedeni gösterir.",
+    "Ağ gecikmesi veya zaman aşımı değerleri bu davranışa yol açabilir.",
+    "Test verisinin her çalıştırmadan önce sıfırlandığını doğrulayın.",
+    "Retry mekanizması geçici hataları gizleyebilir, dikkatli kullanılmalıdır.",
+    "```python\ntry:\n    run_step()\nexcept Exception as e:\n    logger.error(e)\n```",
+    "1. Hatanın tekrarlanabilirliğini kontrol edin.\n2. Ortam değişkenlerini doğrulayın.\n3. Sürüm farklarını inceleyin.",
+    "Monitoring araçlarından CPU ve bellek metriklerini kontrol etmek faydalı olabilir.",
+]
+
+# Yanıt metinleri için kelime havuzu (RESPONSE_SENTENCES ve hata tipleriyle birleştirilir)
+RESPONSE_WORDS = """
+bağlantı zaman aşımı sunucu istemci oturum yapılandırma ortam değişkeni sürücü tarayıcı sürüm
+bağımlılık kütüphane modül paket istek yanıt başlık gövde parametre sorgu veritabanı tablo indeks
+işlem kilit havuz thread süreç bellek işlemci disk ağ port adres sertifika token yetki kimlik
+doğrulama log kayıt uyarı hata istisna yığın satır dosya dizin yol betik test senaryo adım
+assertion fixture mock retry bekleme koşul eleman seçici locator sayfa pencere sekme çerez önbellek
+proxy firewall dns ssl tls http https json xml yaml config endpoint servis gateway container
+docker kubernetes pod pipeline jenkins build artifact release branch commit merge rollback
+migration şema kısıt null değer tip dönüşüm format encoding gecikme throughput heap metrik
+izleme alarm kontrol edin inceleyin doğrulayın güncelleyin yeniden başlatın artırın azaltın
+ekleyin kaldırın genellikle bazen özellikle muhtemelen öncelikle ardından sonra ayrıca ancak
+çünkü eğer ise ve veya ile için bu bir olarak daha çok en gibi kadar olan
+""".split()
+_TOKEN_NAMES = ["user", "order", "payment", "login", "cart", "session", "config", "driver", "page", "report"]
+_TOKEN_FILES = ["service", "handler", "test", "utils", "client", "page"]
+
+def _random_token(rng) -> str:
+    """Yanıtlarda geçen tekil değerler: dosya yolu, id, süre, adres, sürüm"""
+    kind = rng.randrange(6)
+    if kind == 0:
+        return f"{rng.choice(_TOKEN_NAMES)}_{rng.randrange(10000)}"
+    if kind == 1:
+        return (f"src/{rng.choice(_TOKEN_NAMES)}/{rng.choice(_TOKEN_NAMES)}_"
+                f"{rng.choice(_TOKEN_FILES)}.py:{rng.randrange(1, 900)}")
+    if kind == 2:
+        return f"{rng.randrange(1, 30000)}ms"
+    if kind == 3:
+        return f"0x{rng.getrandbits(32):08x}"
+    if kind == 4:
+        return f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}:{rng.randrange(1024, 65535)}"
+    return f"v{rng.randrange(1, 12)}.{rng.randrange(30)}.{rng.randrange(30)}"
+
+def _weighted(items, skew=1.2):
+    """Zipf benzeri çarpık ağırlıklar üretir (ilk eleman en sık)"""
+    return items, [1 / (i + 1) ** skew for i in range(len(items))]
+
+def _build_text_pool(rng, size: int) -> str:
+    """Yanıt metinleri için dilimlenecek büyük ve çeşitli bir metin havuzu.
+
+    Cümleler Zipf dağılımlı bir kelime havuzundan ve tekil değerlerden üretilir;
+    gerçek LLM yanıtlarına yakın bir oranda (~4x) sıkışır.
+    """
+    vocabulary = set(RESPONSE_WORDS)
+    for sentence in RESPONSE_SENTENCES:
+        vocabulary.update(w.strip(".,:`()?").lower() for w in sentence.split())
+    for data in ERROR_DATA.values():
+        vocabulary.update(data["types"])
+    vocabulary.discard("")
+    vocabulary = sorted(vocabulary)
+    rng.shuffle(vocabulary)
+    words, weights = _weighted(vocabulary, skew=0.8)
+    cum_weights = list(itertools.accumulate(weights))
+
+    parts = []
+    length = 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.03:
+            sentence = rng.choice(RESPONSE_SENTENCES)
+        else:
+            chosen = rng.choices(words, cum_weights=cum_weights, k=rng.randrange(6, 20))
+            for i in range(len(chosen)):
+                if rng.random() < 0.2:
+                    chosen[i] = _random_token(rng)
+            sentence = " ".join(chosen)
+            sentence = sentence[0].upper() + sentence[1:] + rng.choice((".", ".", ".", ":", "?"))
+            if roll < 0.1:
+                sentence = "\n\n" + sentence
+            elif roll < 0.16:
+                sentence = f"\n{rng.randrange(1, 8)}. " + sentence
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+def seed_scale(scale: int, seed: int = 42):
+    """Kıyaslama için çok sayıda sentetik Question ve AIResult ekler"""
+    from ai_services import get_all_models
+
     seed_database()
+    rng = random.Random(seed)
+    db = SessionLocal()
+    try:
+        categories = db.query(ErrorCategory).all()
+        category_errors = {
+            c.id: (c.category_name, [e.error_type for e in c.error_types] or [c.category_code])
+            for c in categories
+        }
+        next_question_id = (db.query(func.max(Question.id)).scalar() or 0) + 1
+    finally:
+        db.close()
+
+    category_ids, category_weights = _weighted([c.id for c in categories])
+    models, model_weights = _weighted(get_all_models())
+    # Sağlayıcı bazlı log-normal gecikme (medyan saniye, sigma)
+    latency_params = {"gemini": (math.log(2.5), 0.6), "huggingface": (math.log(6.0), 0.8)}
+    now = datetime.utcnow()
+
+    question_count = max(1, scale // SCALE_RESULTS_PER_QUESTION)
+    start = time.perf_counter()
+    # Küçük ölçeklerde havuz toplam metin kadar olur, yanıtlar neredeyse hiç örtüşmez
+    text_pool = _build_text_pool(
+        rng, min(SCALE_TEXT_POOL_MAX, max(1024 * 1024, scale * SCALE_RESPONSE_MEDIAN * 3 // 2))
+    )
+    print(f"✅ {len(text_pool) // 1024} KB metin havuzu üretildi ({time.perf_counter() - start:.1f} sn)")
+    question_ids = list(range(next_question_id, next_question_id + question_count))
+    question_created = {}
+    start = time.perf_counter()
+
+    # Sorular
+    with engine.begin() as conn:
+        rows = []
+        for question_id in question_ids:
+            category_id = rng.choices(category_ids, category_weights)[0]
+            category_name, errors = category_errors[category_id]
+            question_created[question_id] = now - timedelta(seconds=rng.uniform(0, SCALE_DAYS * 86400))
+            rows.append({
+                "id": question_id,
+                "category_id": category_id,
+                "question_text": rng.choice(QUESTION_TEMPLATES).format(
+                    error=rng.choice(errors), category=category_name
+                ),
+                "created_at": question_created[question_id],
+            })
+            if len(rows) >= SCALE_BATCH_SIZE:
+                conn.execute(insert(Question), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Question), rows)
+        bump_data_version(conn, Question)
+    print(f"✅ {question_count} soru eklendi ({time.perf_counter() - start:.1f} sn)")
+
+    # Sonuçlar: popüler sorular daha çok test edilir
+    _, question_weights = _weighted(question_ids, skew=0.8)
+    inserted = 0
+    while inserted < scale:
+        batch = min(SCALE_BATCH_SIZE, scale - inserted)
+        picked_questions = rng.choices(question_ids, question_weights, k=batch)
+        picked_models = rng.choices(models, model_weights, k=batch)
+        rows = []
+        for question_id, model in zip(picked_questions, picked_models):
+            mu, sigma = latency_params.get(model["provider"], (math.log(4.0), 0.7))
+            length = min(int(rng.lognormvariate(math.log(SCALE_RESPONSE_MEDIAN), 0.7)), SCALE_RESPONSE_MAX)
+            # Dilim kelime sınırından başlar
+            offset = text_pool.find(" ", rng.randrange(0, len(text_pool) - length - 100)) + 1
+            created_at = question_created[question_id]
+            rows.append({
+                "question_id": question_id,
+                "model_name": model["name"],
+                "model_provider": model["provider"],
+                "response": text_pool[offset:offset + length].strip(),
+                "response_time": round(rng.lognormvariate(mu, sigma), 2),
+                # Sonuç, sorusu oluşturulduktan sonra test edilmiş olmalı
+                "tested_at": created_at + (now - created_at) * rng.random(),
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(AIResult), rows)
+            bump_data_version(conn, AIResult)
+        inserted += batch
+        print(f"   {inserted}/{scale} sonuç eklendi", end="\r")
+    print(f"\n✅ {scale} sonuç eklendi ({time.perf_counter() - start:.1f} sn)")
+
+def benchmark_endpoints(max_rows: int = BENCH_MAX_ROWS):
+    """Sorgu endpointlerinin mevcut veriyle HTTP üzerinden yanıt sürelerini ölçer.
+
+    Sayfalama olmayan endpointler tüm listeyi bellekte oluşturur; `max_rows`
+    satırdan fazlasını işleyecek endpointler uyarıyla atlanır. /api/questions
+    her sorunun sonuçlarını da yüklediği için bu sonuçlar da sayılır.
+    """
+    import main
+    from fastapi.testclient import TestClient
+
+    db = SessionLocal()
+    try:
+        question_id = db.query(func.min(Question.id)).scalar()
+        category_id = db.query(func.min(ErrorCategory.id)).scalar()
+        question_count = db.query(func.count(Question.id))
+        result_count = db.query(func.count(AIResult.id))
+        total_questions = question_count.scalar()
+        total_results = result_count.scalar()
+        category_questions = question_count.filter(Question.category_id == category_id).scalar()
+        category_results = result_count.join(Question).filter(Question.category_id == category_id).scalar()
+        question_results = result_count.filter(AIResult.question_id == question_id).scalar()
+        # (url, yanıttaki satır sayısı, işlenen satır sayısı)
+        endpoints = [
+            ("/api/categories", db.query(func.count(ErrorCategory.id)).scalar(), 0),
+            ("/api/questions", total_questions, total_questions + total_results),
+            (f"/api/questions?category_id={category_id}", category_questions,
+             category_questions + category_results),
+            ("/api/results", total_results, total_results),
+            ("/api/stats", 0, 0),
+        ]
+        if question_id is not None:
+            endpoints += [
+                (f"/api/results?question_id={question_id}", question_results, question_results),
+                (f"/api/results/compare/{question_id}", question_results, question_results),
+            ]
+    finally:
+        db.close()
+
+    # Startup olayları çalışmaz (arka plan arşivleyici başlamaz); serileştirme ve
+    # sıkıştırma dahil tüm istek yolu ölçülür, gövde okunup atılır
+    client = TestClient(main.app, headers={"Accept-Encoding": "br, gzip"})
+    print(f"{'Endpoint':<40} {'Süre (ms)':>12} {'Boyut (KB)':>12} {'Kayıt':>10}")
+    for url, rows, cost in endpoints:
+        if cost > max_rows:
+            print(f"GET {url:<36} {'atlandı':>12} {'-':>12} {rows:>10}  ⚠️ {cost} satır > {max_rows} sınırı")
+            continue
+        start = time.perf_counter()
+        with client.stream("GET", url) as response:
+            size = sum(len(chunk) for chunk in response.iter_raw())
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"GET {url:<36} {elapsed:>12.1f} {size / 1024:>12.1f} {rows:>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Veritabanı başlangıç verilerini yükler")
+    parser.add_argument("--scale", type=float, help="Eklenecek sentetik sonuç sayısı (örn. 1e6)")
+    parser.add_argument("--seed", type=int, default=42, help="Rastgele sayı üreteci tohumu")
+    parser.add_argument("--bench", action="store_true", help="Sorgu endpointlerinin sürelerini ölç")
+    parser.add_argument("--bench-max-rows", type=int, default=BENCH_MAX_ROWS,
+                        help="Bundan fazla satır işleyecek endpointleri atla")
+    args = parser.parse_args()
+
+    if args.scale:
+        seed_scale(int(args.scale), args.seed)
+    elif not args.bench:
+        seed_database()
+    if args.bench:
+        benchmark_endpoints(args.bench_max_rows)
@@ -0,0 +1,258 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "./shared_state.db")
+
+# Art arda bu kadar hata alan model bekleme süresine alınır
+HEALTH_FAILURE_THRESHOLD = 3
+HEALTH_BASE_COOLDOWN = 30    # saniye, her ek hatada iki katına çıkar
+HEALTH_MAX_COOLDOWN = 600
+
+_SCHEMA = """
+DROP TABLE IF EXISTS rate_counters;
+CREATE TABLE IF NOT EXISTS rate_windows (
+    key TEXT PRIMARY KEY,
+    window_start REAL NOT NULL,
+    value REAL NOT NULL,
+    prev_value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS inflight (
+    key TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (key, pid)
+);
+CREATE TABLE IF NOT EXISTS model_health (
+    model TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    cooldown_until REAL NOT NULL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class SharedStateStore:
+    """Aynı makinedeki tüm worker süreçlerinin paylaştığı SQLite tabanlı durum deposu"""
+
+    def __init__(self, path: str = SHARED_STATE_PATH):
+        self.path = path
+        self._local = threading.local()
+        # Veritabanı kilitliyken geri verilemeyen slotlar; bir sonraki acquire'da düşülür
+        self._pending_releases = {}
+        self._pending_lock = threading.Lock()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # Her thread ve süreç kendi bağlantısını kullanır (fork sonrası yeniden açılır)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE yazma kilidini baştan alır, oku-değiştir-yaz atomik olur
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ==================== KOTA SAYAÇLARI ====================
+
+    @staticmethod
+    def _window_counts(row, window_start: float, window: float) -> tuple:
+        """Satırdan (mevcut pencere, önceki pencere) sayaçlarını çıkarır"""
+        if row is None:
+            return 0, 0
+        if row[0] == window_start:
+            return row[1], row[2]
+        if row[0] == window_start - window:
+            return 0, row[1]
+        return 0, 0
+
+    @staticmethod
+    def _sliding_estimate(current: float, previous: float, now: float, window_start: float, window: float) -> float:
+        # Kayan pencere: önceki pencere, geçen süre oranında azalan ağırlıkla sayılır.
+        # Sabit pencerede sınırda (0:59 ve 1:00) 2 x limit patlamasına izin verilirdi
+        elapsed = (now - window_start) / window
+        return previous * (1 - elapsed) + current
+
+    def consume(self, key: str, amount: float, limit: float = None, window: float = 60) -> bool:
+        """Kayan zaman penceresindeki sayaca `amount` ekler; limit aşılacaksa eklemez"""
+        return self.consume_many([(key, amount, limit)], window)
+
+    def consume_many(self, items: list, window: float = 60) -> bool:
+        """(key, amount, limit) sayaçlarını tek transaction'da ya hep birlikte tüketir ya hiç"""
+        now = time.time()
+        window_start = now - now % window
+        with self._transaction() as conn:
+            updates = []
+            for key, amount, limit in items:
+                row = conn.execute(
+                    "SELECT window_start, value, prev_value FROM rate_windows WHERE key = ?", (key,)
+                ).fetchone()
+                current, previous = self._window_counts(row, window_start, window)
+                used = self._sliding_estimate(current, previous, now, window_start, window)
+                if limit is not None and used + amount > limit:
+                    return False
+                updates.append((key, window_start, current + amount, previous))
+            conn.executemany(
+                "INSERT OR REPLACE INTO rate_windows (key, window_start, value, prev_value) VALUES (?, ?, ?, ?)",
+                updates
+            )
+        return True
+
+    def usage(self, key: str, window: float = 60) -> float:
+        """Son `window` saniyedeki tahmini kullanım (kayan pencere)"""
+        now = time.time()
+        window_start = now - now % window
+        row = self._connection().execute(
+            "SELECT window_start, value, prev_value FROM rate_windows WHERE key = ?", (key,)
+        ).fetchone()
+        current, previous = self._window_counts(row, window_start, window)
+        return round(self._sliding_estimate(current, previous, now, window_start, window), 2)
+
+    # ==================== EŞZAMANLILIK ====================
+
+    def acquire_slot(self, key: str, limit: int) -> bool:
+        """Tüm süreçlerdeki toplam eşzamanlı istek `limit` altındaysa bir slot alır"""
+        pid = os.getpid()
+        with self._pending_lock:
+            pending = self._pending_releases.pop(key, 0)
+        try:
+            with self._transaction() as conn:
+                if pending:
+                    conn.execute(
+                        "UPDATE inflight SET value = MAX(value - ?, 0) WHERE key = ? AND pid = ?",
+                        (pending, key, pid)
+                    )
+                return self._acquire_slot(conn, key, limit, pid)
+        except sqlite3.Error:
+            with self._pending_lock:
+                self._pending_releases[key] = self._pending_releases.get(key, 0) + pending
+            raise
+
+    def _acquire_slot(self, conn, key: str, limit: int, pid: int) -> bool:
+        total = conn.execute(
+            "SELECT COALESCE(SUM(value), 0) FROM inflight WHERE key = ?", (key,)
+        ).fetchone()[0]
+        if total >= limit:
+            # Çöken süreçlerden kalan slotları temizle
+            pids = [r[0] for r in conn.execute("SELECT pid FROM inflight WHERE key = ?", (key,))]
+            dead = [p for p in pids if p != pid and not _pid_alive(p)]
+            if not dead:
+                return False
+            conn.executemany("DELETE FROM inflight WHERE key = ? AND pid = ?", [(key, p) for p in dead])
+            total = conn.execute(
+                "SELECT COALESCE(SUM(value), 0) FROM inflight WHERE key = ?", (key,)
+            ).fetchone()[0]
+            if total >= limit:
+                return False
+        conn.execute(
+            "INSERT INTO inflight (key, pid, value) VALUES (?, ?, 1) "
+            "ON CONFLICT(key, pid) DO UPDATE SET value = value + 1",
+            (key, pid)
+        )
+        return True
+
+    def release_slot(self, key: str):
+        """Slotu geri verir; veritabanı kilitliyse bir sonraki acquire_slot'a erteler"""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE inflight SET value = MAX(value - 1, 0) WHERE key = ? AND pid = ?",
+                    (key, os.getpid())
+                )
+        except sqlite3.Error:
+            with self._pending_lock:
+                self._pending_releases[key] = self._pending_releases.get(key, 0) + 1
+
+    def wait_for_slot(self, key: str, limit: int, timeout: float, poll: float = 0.05) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.acquire_slot(key, limit):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def inflight(self, key: str) -> int:
+        return self._connection().execute(
+            "SELECT COALESCE(SUM(value), 0) FROM inflight WHERE key = ?", (key,)
+        ).fetchone()[0]
+
+    # ==================== MODEL SAĞLIĞI ====================
+
+    def is_available(self, model: str) -> bool:
+        """Model bekleme süresinde değilse True döner"""
+        row = self._connection().execute(
+            "SELECT cooldown_until FROM model_health WHERE model = ?", (model,)
+        ).fetchone()
+        return row is None or row[0] <= time.time()
+
+    def record_success(self, model: str):
+        conn = self._connection()
+        # Önce okunur (WAL'da kilit almaz); yalnızca hata sayacı varsa yazılır
+        row = conn.execute("SELECT failures FROM model_health WHERE model = ?", (model,)).fetchone()
+        if row is None or row[0] == 0:
+            return
+        conn.execute(
+            "UPDATE model_health SET failures = 0, cooldown_until = 0, last_error = NULL, updated_at = ? "
+            "WHERE model = ?",
+            (time.time(), model)
+        )
+
+    def record_failure(self, model: str, error: str):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT failures FROM model_health WHERE model = ?", (model,)
+            ).fetchone()
+            failures = (row[0] if row else 0) + 1
+            cooldown_until = 0
+            if failures >= HEALTH_FAILURE_THRESHOLD:
+                cooldown = HEALTH_BASE_COOLDOWN * 2 ** (failures - HEALTH_FAILURE_THRESHOLD)
+                cooldown_until = now + min(cooldown, HEALTH_MAX_COOLDOWN)
+            conn.execute(
+                "INSERT OR REPLACE INTO model_health (model, failures, cooldown_until, last_error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (model, failures, cooldown_until, error[:500], now)
+            )
+
+    def get_health(self) -> list:
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT model, failures, cooldown_until, last_error, updated_at FROM model_health"
+        ).fetchall()
+        return [{
+            "model": r[0],
+            "failures": r[1],
+            "available": r[2] <= now,
+            "cooldown_remaining": round(max(r[2] - now, 0), 1),
+            "last_error": r[3]
+        } for r in rows]
+
+# Global paylaşılan durum örneği
+shared_state = SharedStateStore()